@@ -1,9 +1,24 @@
+"""
+Tool-calling agent that creates directories and writes files, using either
+the Mistral API or a local Mistral model served by Ollama.
+
+Ollama handles one request per model at a time by default, so concurrent
+agents (see run_many_with_ollama) only overlap once the server is started
+with parallel slots, e.g.:
+
+    OLLAMA_NUM_PARALLEL=4 OLLAMA_MAX_LOADED_MODELS=1 ollama serve
+"""
 import os
-import json
-from pathlib import Path
+import asyncio
+import logging
+import orjson
 from dotenv import load_dotenv
+from fs_ops import create_directory, get_desktop_path, write_files_async
+from log_setup import start_logging
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Option 1: Using Mistral API (requires API key)
 USE_API = True  # Set to True if you have API key
 
@@ -11,91 +26,7 @@ if USE_API:
     from mistralai import Mistral
 else:
     # Option 2: Using local model via Ollama
-    import requests
-
-def get_desktop_path() -> str:
-    """Get the desktop path for the current OS"""
-    home = str(Path.home())
-    
-    # Windows
-    if os.name == 'nt':
-        desktop = os.path.join(home, 'Desktop')
-    # macOS and Linux
-    else:
-        desktop = os.path.join(home, 'Desktop')
-    
-    return desktop
-
-def create_directory(path: str, directory_name: str) -> dict:
-    """
-    Creates a directory at the specified location.
-    
-    Args:
-        path: The base path where directory should be created
-        directory_name: Name of the directory to create
-        
-    Returns:
-        dict: Status of the operation
-    """
-    try:
-        # Expand user path (handles ~)
-        expanded_path = os.path.expanduser(path)
-        
-        # Create full path
-        full_path = os.path.join(expanded_path, directory_name)
-        
-        # Create directory (parents=True creates intermediate directories)
-        os.makedirs(full_path, exist_ok=True)
-        
-        return {
-            "success": True,
-            "message": f"Directory created successfully at: {full_path}",
-            "path": full_path
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "message": f"Error creating directory: {str(e)}",
-            "path": None
-        }
-
-def write_file(directory_path: str, file_name: str, content: str) -> dict:
-    """
-    Writes content to a file in the specified directory.
-    
-    Args:
-        directory_path: The path to the directory where file should be created
-        file_name: Name of the file (with extension)
-        content: Content to write to the file
-        
-    Returns:
-        dict: Status of the operation
-    """
-    try:
-        # Expand user path (handles ~)
-        expanded_path = os.path.expanduser(directory_path)
-        
-        # Create full file path
-        full_path = os.path.join(expanded_path, file_name)
-        
-        # Ensure directory exists
-        os.makedirs(expanded_path, exist_ok=True)
-        
-        # Write content to file
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        
-        return {
-            "success": True,
-            "message": f"File written successfully at: {full_path}",
-            "path": full_path
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "message": f"Error writing file: {str(e)}",
-            "path": None
-        }
+    import httpx
 
 # Define the tool schema
 tools = [
@@ -119,25 +50,51 @@ tools = [
                 "required": ["path", "directory_name"]
             }
         }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "write_files",
+            "description": "Writes one or more text files into a directory, creating the directory if it doesn't exist.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "directory_path": {
+                        "type": "string",
+                        "description": "The full path of the directory the files should be written to"
+                    },
+                    "files": {
+                        "type": "array",
+                        "description": "The files to write",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "file_name": {
+                                    "type": "string",
+                                    "description": "Name of the file (with extension)"
+                                },
+                                "content": {
+                                    "type": "string",
+                                    "description": "Content to write to the file"
+                                }
+                            },
+                            "required": ["file_name", "content"]
+                        }
+                    }
+                },
+                "required": ["directory_path", "files"]
+            }
+        }
     }
 ]
 
-def run_agent_with_ollama(user_prompt: str):
-    """
-    Run the agent using Ollama (local Mistral model).
-    Requires Ollama to be installed with a Mistral model.
-    """
-    print(f"\n{'='*60}")
-    print(f"User Request: {user_prompt}")
-    print(f"{'='*60}\n")
-    
-    desktop_path = get_desktop_path()
-    
-    # Create system prompt with tool information
-    system_prompt = f"""You are a helpful assistant that can create directories on the user's computer.
+# Static parts of the Ollama system prompt, built once per process
+_TOOLS_JSON = orjson.dumps(tools, option=orjson.OPT_INDENT_2).decode()
+_DESKTOP = get_desktop_path()
+_SYSTEM_PROMPT = f"""You are a helpful assistant that can create directories and write files on the user's computer.
 
 Available tools:
-{json.dumps(tools, indent=2)}
+{_TOOLS_JSON}
 
 When the user asks to create a directory, you should respond with a JSON object containing the tool call:
 {{
@@ -148,89 +105,213 @@ When the user asks to create a directory, you should respond with a JSON object
     }}
 }}
 
-The user's desktop path is: {desktop_path}
+When the user asks to write files, respond with:
+{{
+    "tool": "write_files",
+    "arguments": {{
+        "directory_path": "<path>",
+        "files": [{{"file_name": "<name>", "content": "<text>"}}]
+    }}
+}}
+
+The user's desktop path is: {_DESKTOP}
 
-If the user mentions "desktop" or "desktop location", use the path: {desktop_path}
+If the user mentions "desktop" or "desktop location", use the path: {_DESKTOP}
 """
 
-    # Call Ollama API
+async def _execute_tool(name: str, args: dict) -> list[dict]:
+    """
+    Executes one tool call.
+
+    Args:
+        name: Name of the tool the LLM called
+        args: Parsed tool arguments
+
+    Returns:
+        list[dict]: Status of each operation the tool performed
+    """
+    if name == "create_directory":
+        return [create_directory(args["path"], args["directory_name"])]
+    if name == "write_files":
+        # Files are written concurrently rather than one after another
+        files = [(f["file_name"], f["content"]) for f in args["files"]]
+        return await write_files_async(args["directory_path"], files)
+    return []
+
+def _log_tool_results(results: list[dict]):
+    """Log the status of each operation a tool call performed."""
+    logger.info("Tool Execution Result:")
+    for result in results:
+        logger.info("  Success: %s", result['success'])
+        logger.info("  Message: %s\n", result['message'])
+
+def _new_ollama_client() -> "httpx.AsyncClient":
+    """
+    Create a pooled client for one run, so every Ollama call in it reuses
+    keep-alive connections. Close it before the event loop that used it ends.
+    """
+    return httpx.AsyncClient(
+        base_url="http://localhost:11434",
+        headers={"Content-Type": "application/json"},
+        timeout=httpx.Timeout(300.0, connect=10.0),
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=40, keepalive_expiry=30.0)
+    )
+
+async def _stream_ollama_chat(http: "httpx.AsyncClient", messages: list[dict], stop_at_json: bool = False) -> str:
+    """
+    Stream a chat completion from Ollama and return the generated text.
+
+    Args:
+        http: The client for the current run
+        messages: The chat messages to send
+        stop_at_json: Request JSON output and stop reading as soon as the object is complete
+
+    Returns:
+        str: The generated text
+    """
+    parts = []
+    depth = 0
+    in_string = False
+    escaped = False
+
+    async with http.stream(
+        "POST",
+        "/api/chat",
+        content=orjson.dumps({
+            "model": "mistral",  # or "mistral-nemo", "mistral-small"
+            "messages": messages,
+            "stream": True,
+            # Constrain tool-call replies to a single valid JSON object
+            **({"format": "json"} if stop_at_json else {})
+        })
+    ) as response:
+        response.raise_for_status()
+
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            chunk = orjson.loads(line)
+            piece = chunk.get("message", {}).get("content", "")
+
+            if stop_at_json:
+                # Track brace depth outside of JSON strings to spot the closing brace
+                for i, ch in enumerate(piece):
+                    if in_string:
+                        if escaped:
+                            escaped = False
+                        elif ch == "\\":
+                            escaped = True
+                        elif ch == '"':
+                            in_string = False
+                    elif ch == '"' and depth > 0:
+                        in_string = True
+                    elif ch == "{":
+                        depth += 1
+                    elif ch == "}" and depth > 0:
+                        depth -= 1
+                        if depth == 0:
+                            # Closing the stream early stops Ollama generating the tail
+                            parts.append(piece[:i + 1])
+                            return "".join(parts)
+
+            parts.append(piece)
+            if chunk.get("done"):
+                break
+
+    return "".join(parts)
+
+async def run_agent_with_ollama(user_prompt: str, http: "httpx.AsyncClient | None" = None):
+    """
+    Run the agent using Ollama (local Mistral model).
+    Requires Ollama to be installed with a Mistral model.
+
+    Args:
+        user_prompt: The user's natural language request
+        http: Client to reuse across calls; a new one is opened and closed if omitted
+    """
+    if http is None:
+        async with _new_ollama_client() as http:
+            return await run_agent_with_ollama(user_prompt, http)
+
+    logger.info("\n%s", "=" * 60)
+    logger.info("User Request: %s", user_prompt)
+    logger.info("%s\n", "=" * 60)
+    
+    # Call Ollama API, streaming until the tool call JSON is complete
     try:
-        response = requests.post(
-            "http://localhost:11434/api/chat",
-            json={
-                "model": "mistral",  # or "mistral-nemo", "mistral-small"
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "stream": False
-            }
+        llm_response = await _stream_ollama_chat(
+            http,
+            [
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            stop_at_json=True
         )
+        logger.info("LLM Response:\n%s\n", llm_response)
         
-        if response.status_code != 200:
-            print(f"Error: Ollama returned status {response.status_code}")
-            print(f"Make sure Ollama is running and Mistral model is installed.")
-            print(f"Install with: ollama pull mistral")
-            return
-        
-        llm_response = response.json()["message"]["content"]
-        print(f"LLM Response:\n{llm_response}\n")
-        
-        # Try to extract JSON tool call from response
+        # The reply is constrained to valid JSON, but not to the tool call shape
         try:
-            # Look for JSON in the response
-            start = llm_response.find('{')
-            end = llm_response.rfind('}') + 1
+            tool_call = orjson.loads(llm_response)
+            if not isinstance(tool_call, dict) or tool_call.get("tool") not in ("create_directory", "write_files"):
+                raise TypeError("not a tool call object")
             
-            if start != -1 and end > start:
-                json_str = llm_response[start:end]
-                tool_call = json.loads(json_str)
-                
-                if tool_call.get("tool") == "create_directory":
-                    args = tool_call["arguments"]
-                    print(f"Tool Called: create_directory")
-                    print(f"Arguments: {args}\n")
-                    
-                    # Execute the tool
-                    result = create_directory(args["path"], args["directory_name"])
-                    
-                    print(f"Tool Execution Result:")
-                    print(f"  Success: {result['success']}")
-                    print(f"  Message: {result['message']}\n")
-                    
-                    # Get final response from LLM
-                    final_response = requests.post(
-                        "http://localhost:11434/api/chat",
-                        json={
-                            "model": "mistral",
-                            "messages": [
-                                {"role": "system", "content": system_prompt},
-                                {"role": "user", "content": user_prompt},
-                                {"role": "assistant", "content": llm_response},
-                                {"role": "user", "content": f"Tool execution result: {json.dumps(result)}. Please provide a natural response to the user."}
-                            ],
-                            "stream": False
-                        }
-                    )
-                    
-                    final_text = final_response.json()["message"]["content"]
-                    print(f"Final Response:\n{final_text}\n")
+            args = tool_call["arguments"]
+            logger.info("Tool Called: %s", tool_call["tool"])
+            logger.info("Arguments: %s\n", args)
+            
+            # Execute the tool
+            results = await _execute_tool(tool_call["tool"], args)
+        
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            logger.warning("Could not parse tool call from LLM response.")
+            return
         
-        except json.JSONDecodeError:
-            print("Could not parse tool call from LLM response.")
+        _log_tool_results(results)
+        
+        # Get final response from LLM
+        final_text = await _stream_ollama_chat(http, [
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+            {"role": "assistant", "content": llm_response},
+            {"role": "user", "content": f"Tool execution result: {orjson.dumps(results).decode()}. Please provide a natural response to the user."}
+        ])
+        logger.info("Final Response:\n%s\n", final_text)
             
-    except requests.exceptions.ConnectionError:
-        print("Error: Could not connect to Ollama.")
-        print("Make sure Ollama is running: ollama serve")
-        print("And Mistral model is installed: ollama pull mistral")
+    except httpx.HTTPStatusError as e:
+        logger.error("Error: Ollama returned status %s", e.response.status_code)
+        logger.error("Make sure Ollama is running and Mistral model is installed.")
+        logger.error("Install with: ollama pull mistral")
+
+    except httpx.ConnectError:
+        logger.error("Error: Could not connect to Ollama.")
+        logger.error("Make sure Ollama is running: ollama serve")
+        logger.error("And Mistral model is installed: ollama pull mistral")
 
-def run_agent_with_api(user_prompt: str, api_key: str):
+async def run_many_with_ollama(prompts: list[str]):
+    """
+    Run the Ollama agent for several prompts concurrently.
+    Needs OLLAMA_NUM_PARALLEL > 1 on the server to actually overlap.
+
+    Args:
+        prompts: The user's natural language requests
+    """
+    # One client for the whole run, closed before the event loop ends
+    async with _new_ollama_client() as http:
+        return await asyncio.gather(*[run_agent_with_ollama(prompt, http) for prompt in prompts])
+
+async def run_agent_with_api(user_prompt: str, api_key: str, natural_reply: bool = False):
     """
     Run the agent using Mistral API.
+
+    Args:
+        user_prompt: The user's natural language request
+        api_key: Mistral API key
+        natural_reply: Ask the LLM to phrase the final reply instead of
+            confirming locally (costs a second API call)
     """
-    print(f"\n{'='*60}")
-    print(f"User Request: {user_prompt}")
-    print(f"{'='*60}\n")
+    logger.info("\n%s", "=" * 60)
+    logger.info("User Request: %s", user_prompt)
+    logger.info("%s\n", "=" * 60)
     
     client = Mistral(api_key=api_key)
     desktop_path = get_desktop_path()
@@ -238,70 +319,79 @@ def run_agent_with_api(user_prompt: str, api_key: str):
     
     messages = [{"role": "user", "content": enhanced_prompt}]
     
-    # First API call
-    response = client.chat.complete(
+    # First API call - a tool call is forced, so no "decide" round-trip
+    response = await client.chat.complete_async(
         model="mistral-large-latest",
         messages=messages,
         tools=tools,
-        tool_choice="auto"
+        tool_choice="any",
+        parallel_tool_calls=True
     )
     
-    print("LLM Response:")
-    print(f"Stop Reason: {response.choices[0].finish_reason}\n")
+    logger.info("LLM Response:")
+    logger.info("Stop Reason: %s\n", response.choices[0].finish_reason)
     
     if response.choices[0].finish_reason == "tool_calls":
         tool_calls = response.choices[0].message.tool_calls
         messages.append(response.choices[0].message)
+        results = []
         
         for tool_call in tool_calls:
-            print(f"Tool Called: {tool_call.function.name}")
-            print(f"Arguments: {tool_call.function.arguments}\n")
+            logger.info("Tool Called: %s", tool_call.function.name)
+            logger.info("Arguments: %s\n", tool_call.function.arguments)
+            
+            args = orjson.loads(tool_call.function.arguments)
             
-            args = json.loads(tool_call.function.arguments)
+            tool_results = await _execute_tool(tool_call.function.name, args)
+            _log_tool_results(tool_results)
             
-            if tool_call.function.name == "create_directory":
-                result = create_directory(args["path"], args["directory_name"])
-                
-                print(f"Tool Execution Result:")
-                print(f"  Success: {result['success']}")
-                print(f"  Message: {result['message']}\n")
-                
-                messages.append({
-                    "role": "tool",
-                    "name": tool_call.function.name,
-                    "content": json.dumps(result),
-                    "tool_call_id": tool_call.id
-                })
+            results.extend(tool_results)
+            messages.append({
+                "role": "tool",
+                "name": tool_call.function.name,
+                "content": orjson.dumps(tool_results).decode(),
+                "tool_call_id": tool_call.id
+            })
         
-        final_response = client.chat.complete(
-            model="mistral-large-latest",
-            messages=messages
-        )
+        if natural_reply:
+            final_response = await client.chat.complete_async(
+                model="mistral-large-latest",
+                messages=messages
+            )
+            final_text = final_response.choices[0].message.content
+        else:
+            # Confirm from the tool results without a second API call
+            final_text = "\n".join(result["message"] for result in results)
         
-        print(f"Final Response:\n{final_response.choices[0].message.content}\n")
+        logger.info("Final Response:\n%s\n", final_text)
     else:
-        print(f"LLM Response: {response.choices[0].message.content}\n")
+        logger.info("LLM Response: %s\n", response.choices[0].message.content)
 
 if __name__ == "__main__":
+    listener = start_logging(__name__)
+
     # Example prompt
     user_input = """
     create 4 essays regarding artificial intelligence and each of them consisting of 3 sentences. and store these 4 essays in a directory called essay in {cwd}. 
     Name them essay_1.txt, essay_2.txt, essay_3.txt, and essay_4.txt
     """
 
-    
-    if USE_API:
-        # If using Mistral API
-        api_key = os.getenv("MISTRAL_API_KEY") or "YOUR_API_KEY_HERE"
-        if api_key == "YOUR_API_KEY_HERE":
-            print("Error: Please set your MISTRAL_API_KEY environment variable")
-            print("Or replace 'YOUR_API_KEY_HERE' with your actual API key")
+
+    try:
+        if USE_API:
+            # If using Mistral API
+            api_key = os.getenv("MISTRAL_API_KEY") or "YOUR_API_KEY_HERE"
+            if api_key == "YOUR_API_KEY_HERE":
+                print("Error: Please set your MISTRAL_API_KEY environment variable")
+                print("Or replace 'YOUR_API_KEY_HERE' with your actual API key")
+            else:
+                asyncio.run(run_agent_with_api(user_input, api_key))
         else:
-            run_agent_with_api(user_input, api_key)
-    else:
-        # Using local Ollama (recommended for open source)
-        print("Using local Ollama with Mistral model...")
-        print("Make sure Ollama is installed and running!")
-        print("Installation: https://ollama.ai/download")
-        print("Install Mistral: ollama pull mistral\n")
-        run_agent_with_ollama(user_input)
\ No newline at end of file
+            # Using local Ollama (recommended for open source)
+            print("Using local Ollama with Mistral model...")
+            print("Make sure Ollama is installed and running!")
+            print("Installation: https://ollama.ai/download")
+            print("Install Mistral: ollama pull mistral\n")
+            asyncio.run(run_agent_with_ollama(user_input))
+    finally:
+        listener.stop()
\ No newline at end of file
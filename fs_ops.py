@@ -0,0 +1,153 @@
+"""
+Filesystem helpers shared by the tool-calling agents.
+"""
+import os
+import asyncio
+import functools
+from pathlib import Path
+
+@functools.lru_cache(maxsize=1)
+def get_desktop_path() -> str:
+    """Get the desktop path for the current OS"""
+    # Same location on Windows, macOS and Linux
+    return os.path.join(str(Path.home()), 'Desktop')
+
+def create_directory(path: str, directory_name: str) -> dict:
+    """
+    Creates a directory at the specified location.
+    
+    Args:
+        path: The base path where directory should be created
+        directory_name: Name of the directory to create
+        
+    Returns:
+        dict: Status of the operation
+    """
+    try:
+        # Expand user path (handles ~)
+        expanded_path = os.path.expanduser(path)
+        
+        # Create full path
+        full_path = os.path.join(expanded_path, directory_name)
+        
+        # Create directory with a single mkdir; only walk the parents when one is missing
+        try:
+            os.mkdir(full_path)
+        except FileExistsError:
+            if not os.path.isdir(full_path):
+                raise
+        except FileNotFoundError:
+            os.makedirs(full_path, exist_ok=True)
+        
+        return {
+            "success": True,
+            "message": f"Directory created successfully at: {full_path}",
+            "path": full_path
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"Error creating directory: {str(e)}",
+            "path": None
+        }
+
+def write_file(directory_path: str, file_name: str, content: str) -> dict:
+    """
+    Writes content to a file in the specified directory.
+    
+    Args:
+        directory_path: The path to the directory where file should be created
+        file_name: Name of the file (with extension)
+        content: Content to write to the file
+        
+    Returns:
+        dict: Status of the operation
+    """
+    try:
+        # Expand user path (handles ~)
+        expanded_path = os.path.expanduser(directory_path)
+        
+        # Create full file path
+        full_path = os.path.join(expanded_path, file_name)
+        
+        # Write content to file, creating the directory only if it is missing
+        try:
+            f = open(full_path, 'w', encoding='utf-8')
+        except FileNotFoundError:
+            os.makedirs(expanded_path, exist_ok=True)
+            f = open(full_path, 'w', encoding='utf-8')
+        with f:
+            f.write(content)
+        
+        return {
+            "success": True,
+            "message": f"File written successfully at: {full_path}",
+            "path": full_path
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"Error writing file: {str(e)}",
+            "path": None
+        }
+
+async def write_file_async(directory_path: str, file_name: str, content: str) -> dict:
+    """
+    Writes content to a file in the specified directory without blocking the event loop.
+
+    Args:
+        directory_path: The path to the directory where file should be created
+        file_name: Name of the file (with extension)
+        content: Content to write to the file
+
+    Returns:
+        dict: Status of the operation
+    """
+    # Imported here so callers that only need the sync helpers don't require aiofiles
+    import aiofiles
+
+    try:
+        # Expand user path (handles ~)
+        expanded_path = os.path.expanduser(directory_path)
+
+        # Create full file path
+        full_path = os.path.join(expanded_path, file_name)
+
+        # Write content to file, creating the directory only if it is missing
+        try:
+            f = await aiofiles.open(full_path, 'w', encoding='utf-8')
+        except FileNotFoundError:
+            await asyncio.to_thread(os.makedirs, expanded_path, exist_ok=True)
+            f = await aiofiles.open(full_path, 'w', encoding='utf-8')
+        try:
+            await f.write(content)
+        finally:
+            await f.close()
+
+        return {
+            "success": True,
+            "message": f"File written successfully at: {full_path}",
+            "path": full_path
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"Error writing file: {str(e)}",
+            "path": None
+        }
+
+async def write_files_async(directory_path: str, files: list[tuple[str, str]]) -> list[dict]:
+    """
+    Writes several files into one directory concurrently.
+
+    Args:
+        directory_path: The path to the directory where files should be created
+        files: (file_name, content) pairs to write
+
+    Returns:
+        list[dict]: Status of each write, in the order given
+    """
+    return await asyncio.gather(*[
+        write_file_async(directory_path, file_name, content)
+        for file_name, content in files
+    ])
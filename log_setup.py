@@ -0,0 +1,24 @@
+"""
+Logging setup shared by the tool-calling agent scripts.
+"""
+import sys
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+def start_logging(*names: str) -> QueueListener:
+    """
+    Route the named loggers through a queue so agent code never blocks on stdout.
+    Only these loggers are set to INFO; the root logger (and httpx) keep their level.
+    """
+    log_queue = queue.SimpleQueue()
+    handler = QueueHandler(log_queue)
+    for name in names:
+        log = logging.getLogger(name)
+        log.setLevel(logging.INFO)
+        log.addHandler(handler)
+        log.propagate = False
+
+    listener = QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+    listener.start()
+    return listener
@@ -1,13 +1,16 @@
 import os
-import json
-from pathlib import Path
+import asyncio
+import logging
+import orjson
 from mistralai import Mistral
 from dotenv import load_dotenv
+from fs_ops import create_directory, get_desktop_path
+from log_setup import start_logging
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 api_key = os.getenv("MISTRAL_API_KEY")
-# Initialize Mistral client
-client = Mistral(api_key=api_key)
 
 # Define the tool for creating directories
 tools = [
@@ -34,62 +37,48 @@ tools = [
     }
 ]
 
-def create_directory(path: str, directory_name: str) -> dict:
+def _dispatch_tool_calls(tool_calls: list, messages: list):
     """
-    Creates a directory at the specified location.
+    Execute each tool call from an LLM response and append its result to the conversation.
     
     Args:
-        path: The base path where directory should be created
-        directory_name: Name of the directory to create
-        
-    Returns:
-        dict: Status of the operation
+        tool_calls: The tool calls from the LLM response
+        messages: The conversation the tool results are appended to
     """
-    try:
-        # Expand user path (handles ~)
-        expanded_path = os.path.expanduser(path)
-        
-        # Create full path
-        full_path = os.path.join(expanded_path, directory_name)
+    for tool_call in tool_calls:
+        logger.info("Tool Called: %s", tool_call.function.name)
+        logger.info("Arguments: %s\n", tool_call.function.arguments)
         
-        # Create directory (parents=True creates intermediate directories)
-        os.makedirs(full_path, exist_ok=True)
+        # Parse arguments
+        args = orjson.loads(tool_call.function.arguments)
         
-        return {
-            "success": True,
-            "message": f"Directory created successfully at: {full_path}",
-            "path": full_path
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "message": f"Error creating directory: {str(e)}",
-            "path": None
-        }
-
-def get_desktop_path() -> str:
-    """Get the desktop path for the current OS"""
-    home = str(Path.home())
-    
-    # Windows
-    if os.name == 'nt':
-        desktop = os.path.join(home, 'Desktop')
-    # macOS and Linux
-    else:
-        desktop = os.path.join(home, 'Desktop')
-    
-    return desktop
+        # Execute the tool
+        if tool_call.function.name == "create_directory":
+            result = create_directory(args["path"], args["directory_name"])
+            
+            logger.info("Tool Execution Result:")
+            logger.info("  Success: %s", result['success'])
+            logger.info("  Message: %s\n", result['message'])
+            
+            # Add tool result to messages
+            messages.append({
+                "role": "tool",
+                "name": tool_call.function.name,
+                "content": orjson.dumps(result).decode(),
+                "tool_call_id": tool_call.id
+            })
 
-def run_agent(user_prompt: str):
+async def run_agent(client: Mistral, user_prompt: str):
     """
     Run the Mistral agent with tool calling capability.
     
     Args:
+        client: The Mistral client for the current run
         user_prompt: The user's natural language request
     """
-    print(f"\n{'='*60}")
-    print(f"User Request: {user_prompt}")
-    print(f"{'='*60}\n")
+    logger.info("\n%s", "=" * 60)
+    logger.info("User Request: %s", user_prompt)
+    logger.info("%s\n", "=" * 60)
     
     # Add context about desktop location
     desktop_path = get_desktop_path()
@@ -103,15 +92,15 @@ def run_agent(user_prompt: str):
     ]
     
     # First API call - LLM decides which tool to use
-    response = client.chat.complete(
+    response = await client.chat.complete_async(
         model="mistral-large-latest",  # or "mistral-small-latest" for faster responses
         messages=messages,
         tools=tools,
         tool_choice="auto"
     )
     
-    print("LLM Response:")
-    print(f"Stop Reason: {response.choices[0].finish_reason}\n")
+    logger.info("LLM Response:")
+    logger.info("Stop Reason: %s\n", response.choices[0].finish_reason)
     
     # Check if LLM wants to call a tool
     if response.choices[0].finish_reason == "tool_calls":
@@ -121,44 +110,120 @@ def run_agent(user_prompt: str):
         messages.append(response.choices[0].message)
         
         # Process each tool call
-        for tool_call in tool_calls:
-            print(f"Tool Called: {tool_call.function.name}")
-            print(f"Arguments: {tool_call.function.arguments}\n")
-            
-            # Parse arguments
-            args = json.loads(tool_call.function.arguments)
-            
-            # Execute the tool
-            if tool_call.function.name == "create_directory":
-                result = create_directory(args["path"], args["directory_name"])
-                
-                print(f"Tool Execution Result:")
-                print(f"  Success: {result['success']}")
-                print(f"  Message: {result['message']}\n")
-                
-                # Add tool result to messages
-                messages.append({
-                    "role": "tool",
-                    "name": tool_call.function.name,
-                    "content": json.dumps(result),
-                    "tool_call_id": tool_call.id
-                })
+        _dispatch_tool_calls(tool_calls, messages)
         
         # Second API call - LLM processes tool results and responds to user
-        final_response = client.chat.complete(
+        final_response = await client.chat.complete_async(
             model="mistral-large-latest",
             messages=messages
         )
         
-        print(f"Final Response to User:")
-        print(f"{final_response.choices[0].message.content}\n")
+        logger.info("Final Response to User:")
+        logger.info("%s\n", final_response.choices[0].message.content)
         
     else:
         # No tool was called
-        print(f"LLM Response: {response.choices[0].message.content}\n")
+        logger.info("LLM Response: %s\n", response.choices[0].message.content)
+
+async def run_many(client: Mistral, prompts: list[str]):
+    """
+    Run the agent for several prompts concurrently.
+    
+    Args:
+        client: The Mistral client for the current run
+        prompts: The user's natural language requests
+    """
+    return await asyncio.gather(*[run_agent(client, prompt) for prompt in prompts])
+
+async def run_agent_batch(client: Mistral, prompts: list[str]):
+    """
+    Run the Mistral agent on several prompts with a single tool-calling request.
+
+    Args:
+        client: The Mistral client for the current run
+        prompts: The user's natural language requests
+    """
+    logger.info("\n%s", "=" * 60)
+    logger.info("Batched User Requests: %s", len(prompts))
+    logger.info("%s\n", "=" * 60)
+
+    # Number the requests so the LLM emits one tool call per request
+    desktop_path = get_desktop_path()
+    numbered = "\n".join(f"{i}. {prompt}" for i, prompt in enumerate(prompts, start=1))
+
+    messages = [
+        {
+            "role": "system",
+            "content": "For each numbered user request below, emit one `create_directory` tool call."
+        },
+        {
+            "role": "user",
+            "content": f"{numbered}\n\nNote: The desktop path is: {desktop_path}"
+        }
+    ]
+
+    # Single API call - LLM emits the tool calls for every request at once
+    response = await client.chat.complete_async(
+        model="mistral-large-latest",
+        messages=messages,
+        tools=tools,
+        tool_choice="any",
+        parallel_tool_calls=True
+    )
+
+    logger.info("LLM Response:")
+    logger.info("Stop Reason: %s\n", response.choices[0].finish_reason)
+
+    if response.choices[0].finish_reason != "tool_calls":
+        logger.info("LLM Response: %s\n", response.choices[0].message.content)
+        return
+
+    tool_calls = response.choices[0].message.tool_calls
+    messages.append(response.choices[0].message)
+
+    # Dispatch every tool call from the one response
+    _dispatch_tool_calls(tool_calls, messages)
+
+    # One follow-up call summarises all results for the user
+    final_response = await client.chat.complete_async(
+        model="mistral-large-latest",
+        messages=messages
+    )
+
+    logger.info("Final Response to User:")
+    logger.info("%s\n", final_response.choices[0].message.content)
+
+async def warm_up(client: Mistral):
+    """Open the HTTPS connection to api.mistral.ai on the client's pool before the first real request."""
+    try:
+        await client.models.list_async()
+    except Exception:
+        # Warm-up is best effort; the real request will surface any error
+        pass
+
+async def main(prompts: list[str] | None = None):
+    """
+    Run the agent on the given prompts, or on one read from stdin.
+    
+    Args:
+        prompts: The user's natural language requests; asks interactively if omitted
+    """
+    # The SDK's async connections are bound to this event loop, so the client
+    # is opened and closed per run rather than shared at module level
+    async with Mistral(api_key=api_key) as client:
+        if prompts is None:
+            # DNS, TCP and TLS setup overlap with the user typing
+            warm = asyncio.create_task(warm_up(client))
+            prompts = [await asyncio.to_thread(input, "Enter your request: ")]
+            await warm
+        
+        # All prompts go out in one request; use run_many(client, prompts) to send one request per prompt
+        await run_agent_batch(client, prompts)
 
 # Example usage
 if __name__ == "__main__":
+    listener = start_logging(__name__)
+
     # Example prompts
     prompts = [
         "create a directory for storing the testing results in my pc desktop location",
@@ -166,10 +231,11 @@ if __name__ == "__main__":
         "I need a directory named 'backup_2024' on the desktop"
     ]
     
-    # You can test with any prompt
-    user_input = prompts[0]
-    
-    # Or use interactive mode
-    # user_input = input("Enter your request: ")
-    
-    run_agent(user_input)
\ No newline at end of file
+    # You can test with any subset of the prompts
+    try:
+        asyncio.run(main(prompts))
+        
+        # Or use interactive mode
+        # asyncio.run(main())
+    finally:
+        listener.stop()
\ No newline at end of file